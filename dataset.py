@@ -0,0 +1,289 @@
+from simplejson import load as load_json, dump as dump_json
+from os import makedirs, replace
+from os.path import exists, join
+
+from typing import List, Tuple, Union
+
+try:
+    import numpy
+
+except ImportError:
+    numpy = None
+
+
+MANIFEST_FILENAME: str = "manifest.json"
+MANIFEST_FILE_ENCODING: str = "utf-8"
+MANIFEST_VERSION: int = 1
+
+DEFAULT_SHARD_SIZE: int = 1 << 20
+DEFAULT_BUFFER_SIZE: int = 1 << 14
+
+Sample = Tuple[int, int, int, Tuple[Tuple[int, int], ...], int]
+
+
+def require_numpy() -> None:
+    if numpy is None:
+        raise RuntimeError("Dataset export requires numpy: pip install numpy")
+
+
+def get_dtype(height: int) -> 'numpy.dtype':
+    return numpy.dtype([
+        ("board", numpy.uint16, (height,)),
+        ("piece", numpy.uint8),
+        ("x", numpy.int8),
+        ("y", numpy.int8),
+        ("coords", numpy.int8, (4, 2)),
+        ("lines", numpy.uint8)
+    ])
+
+
+def unpack_board(rows: 'numpy.ndarray', width: int) -> 'numpy.ndarray':
+    return (rows[..., None] >> numpy.arange(width, dtype=numpy.uint16)) & 1 == 1
+
+
+class DatasetExporter:
+    def __init__(
+        self,
+        directory: str,
+        width: int,
+        height: int,
+        shard_size: int = DEFAULT_SHARD_SIZE,
+        buffer_size: int = DEFAULT_BUFFER_SIZE
+    ) -> None:
+        require_numpy()
+
+        if width > 16:
+            raise ValueError("Boards wider than 16 cells do not fit into uint16 rows")
+
+        self.directory: str = directory
+        self.width: int = width
+        self.height: int = height
+        self.shard_size: int = shard_size
+        self.buffer_size: int = min(buffer_size, shard_size)
+        self.dtype: numpy.dtype = get_dtype(height)
+
+        self.boards: List[bytes] = []
+        self.samples: List[Sample] = []
+
+        self.shards: List[dict] = []
+        self.shard: Union[numpy.memmap, None] = None
+        self.shard_count: int = 0
+        self.shard_capacity: int = 0
+
+        self.bit_weights: numpy.ndarray = (1 << numpy.arange(width, dtype=numpy.uint16)).astype(numpy.uint16)
+
+        makedirs(directory, exist_ok=True)
+
+        manifest_path: str = join(directory, MANIFEST_FILENAME)
+
+        if exists(manifest_path):
+            with open(manifest_path, "r", encoding=MANIFEST_FILE_ENCODING) as file:
+                manifest: dict = load_json(
+                    fp = file
+                )
+
+            if manifest["width"] != width or manifest["height"] != height:
+                raise ValueError(f"{manifest_path} was written for a different board size")
+
+            self.shards = manifest["shards"]
+
+            if self.shards and self.shards[-1]["count"] < shard_size:
+                self.continue_shard()
+
+    def record(self, board: bytes, piece: int, x: int, y: int, coords: Tuple[Tuple[int, int], ...], lines: int) -> None:
+        self.boards.append(board)
+        self.samples.append((piece, x, y, coords, lines))
+
+        if len(self.boards) >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        count: int = len(self.boards)
+
+        if not count:
+            return
+
+        cells: numpy.ndarray = numpy.frombuffer(b"".join(self.boards), dtype=numpy.uint8).reshape(count, self.height, self.width)
+
+        chunk: numpy.ndarray = numpy.empty(count, dtype=self.dtype)
+        chunk["board"] = (cells != 0).astype(numpy.uint16) @ self.bit_weights
+
+        pieces: List[int]
+        xs: List[int]
+        ys: List[int]
+        coords: List[Tuple[Tuple[int, int], ...]]
+        lines: List[int]
+
+        pieces, xs, ys, coords, lines = zip(*self.samples)
+
+        chunk["piece"] = pieces
+        chunk["x"] = xs
+        chunk["y"] = ys
+        chunk["coords"] = numpy.array(coords, dtype=numpy.int8)
+        chunk["lines"] = lines
+
+        self.boards = []
+        self.samples = []
+
+        start: int = 0
+
+        while start < count:
+            if self.shard is None:
+                self.open_shard()
+
+            end: int = min(count, start + self.shard_size - self.shard_count)
+
+            if self.shard_count + end - start > self.shard_capacity:
+                self.resize_shard(min(self.shard_size, max(self.shard_capacity * 2, self.shard_count + end - start)))
+
+            self.shard[self.shard_count:self.shard_count + end - start] = chunk[start:end]
+
+            self.shard_count += end - start
+            start = end
+
+            if self.shard_count == self.shard_size:
+                self.close_shard()
+
+        # NOTE: keep the manifest in step with the shard so a crash loses
+        # at most the samples buffered since the last flush.
+        if self.shard is not None:
+            self.shard.flush()
+            self.shards[-1]["count"] = self.shard_count
+            self.write_manifest()
+
+    def open_shard(self) -> None:
+        filename: str = f"shard-{len(self.shards):05d}.npy"
+        capacity: int = self.buffer_size
+
+        self.shard = numpy.lib.format.open_memmap(
+            join(self.directory, filename),
+            mode = "w+",
+            dtype = self.dtype,
+            shape = (capacity,)
+        )
+
+        self.shard_count = 0
+        self.shard_capacity = capacity
+        self.shards.append({"file": filename, "count": 0})
+
+    def continue_shard(self) -> None:
+        shard: dict = self.shards[-1]
+        path: str = join(self.directory, shard["file"])
+
+        if not exists(path):
+            self.shards.pop()
+            return
+
+        self.shard = numpy.lib.format.open_memmap(path, mode="r+")
+
+        if self.shard.dtype != self.dtype:
+            raise ValueError(f"{path} was written with a different sample format")
+
+        self.shard_count = shard["count"]
+        self.shard_capacity = len(self.shard)
+
+    def resize_shard(self, capacity: int) -> None:
+        path: str = join(self.directory, self.shards[-1]["file"])
+        resized_path: str = f"{path}.resize"
+
+        resized: numpy.memmap = numpy.lib.format.open_memmap(
+            resized_path,
+            mode = "w+",
+            dtype = self.dtype,
+            shape = (capacity,)
+        )
+
+        resized[:self.shard_count] = self.shard[:self.shard_count]
+        resized.flush()
+
+        # NOTE: drop the old mapping before the file under it is replaced.
+        self.shard = None
+        del resized
+
+        replace(resized_path, path)
+
+        self.shard = numpy.lib.format.open_memmap(path, mode="r+")
+        self.shard_capacity = capacity
+
+    def close_shard(self) -> None:
+        if 0 < self.shard_count < self.shard_capacity:
+            self.resize_shard(self.shard_count)
+
+        self.shard.flush()
+        self.shard = None
+
+        self.shards[-1]["count"] = self.shard_count
+        self.write_manifest()
+
+    def write_manifest(self) -> None:
+        with open(join(self.directory, MANIFEST_FILENAME), "w", encoding=MANIFEST_FILE_ENCODING) as file:
+            dump_json(
+                obj = {
+                    "version": MANIFEST_VERSION,
+                    "width": self.width,
+                    "height": self.height,
+                    "shard_size": self.shard_size,
+                    "shards": self.shards
+                },
+                fp = file
+            )
+
+    def close(self) -> None:
+        self.flush()
+
+        if self.shard is not None:
+            self.close_shard()
+
+
+class DatasetReader:
+    def __init__(self, directory: str) -> None:
+        require_numpy()
+
+        self.directory: str = directory
+
+        with open(join(directory, MANIFEST_FILENAME), "r", encoding=MANIFEST_FILE_ENCODING) as file:
+            manifest: dict = load_json(
+                fp = file
+            )
+
+        self.width: int = manifest["width"]
+        self.height: int = manifest["height"]
+        self.shards: List[dict] = [
+            shard
+            for shard in manifest["shards"]
+            if shard["count"]
+        ]
+
+        self.offsets: List[int] = [0]
+
+        for shard in self.shards:
+            self.offsets.append(self.offsets[-1] + shard["count"])
+
+        self.shard_index: int = -1
+        self.shard: Union[numpy.ndarray, None] = None
+
+    def __len__(self) -> int:
+        return self.offsets[-1]
+
+    def get_shard(self, shard_index: int) -> 'numpy.ndarray':
+        if shard_index != self.shard_index:
+            shard: dict = self.shards[shard_index]
+
+            self.shard = numpy.load(join(self.directory, shard["file"]), mmap_mode="r")[:shard["count"]]
+            self.shard_index = shard_index
+
+        return self.shard
+
+    def __getitem__(self, index: int) -> 'numpy.void':
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        shard_index: int = int(numpy.searchsorted(self.offsets, index, side="right")) - 1
+
+        return self.get_shard(shard_index)[index - self.offsets[shard_index]]
+
+    def board(self, index: int) -> 'numpy.ndarray':
+        return unpack_board(self[index]["board"], self.width)
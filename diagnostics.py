@@ -0,0 +1,184 @@
+from PyQt5.QtCore import QObject
+
+from contextlib import nullcontext
+from collections import deque
+from functools import wraps
+from sys import getallocatedblocks, stderr
+from time import monotonic
+import tracemalloc
+
+from typing import Callable, ContextManager, Deque, Dict, List, Tuple, Union
+
+
+PHASES: Tuple[str, ...] = ("input", "tick", "lock", "clear", "paint")
+
+TRACEMALLOC_FRAMES: int = 8
+GROWTH_WARNING_BYTES: int = 256 * 1024
+QT_OBJECTS_HISTORY_LENGTH: int = 720
+TOP_GROWTH_STATS: int = 5
+
+HAS_RESET_PEAK: bool = hasattr(tracemalloc, "reset_peak")
+
+
+class PhaseStats:
+    def __init__(self) -> None:
+        self.calls: int = 0
+        self.allocated: int = 0
+        self.blocks: int = 0
+        self.bytes: int = 0
+
+    def reset(self) -> None:
+        self.calls = 0
+        self.allocated = 0
+        self.blocks = 0
+        self.bytes = 0
+
+
+class Phase:
+    def __init__(self, stats: PhaseStats, stack: List['Phase']) -> None:
+        self.stats: PhaseStats = stats
+        self.stack: List[Phase] = stack
+
+        self.start_blocks: int = 0
+        self.start_bytes: int = 0
+        self.peak_bytes: int = 0
+
+    def begin_segment(self) -> None:
+        self.start_blocks = getallocatedblocks()
+        self.start_bytes = tracemalloc.get_traced_memory()[0]
+
+        if HAS_RESET_PEAK:
+            tracemalloc.reset_peak()
+
+    def end_segment(self) -> None:
+        current: int
+        peak: int
+
+        current, peak = tracemalloc.get_traced_memory()
+
+        self.stats.blocks += getallocatedblocks() - self.start_blocks
+        self.stats.bytes += current - self.start_bytes
+        self.peak_bytes = max(self.peak_bytes, (peak if HAS_RESET_PEAK else current) - self.start_bytes)
+
+    def __enter__(self) -> None:
+        if self.stack:
+            self.stack[-1].end_segment()
+
+        self.stack.append(self)
+        self.peak_bytes = 0
+        self.begin_segment()
+
+    def __exit__(self, *exc_info) -> None:
+        self.end_segment()
+        self.stack.pop()
+
+        self.stats.calls += 1
+        self.stats.allocated += self.peak_bytes
+
+        if self.stack:
+            self.stack[-1].begin_segment()
+
+
+class MemoryDiagnostics:
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled: bool = enabled
+
+        self.phases: Dict[str, PhaseStats] = {
+            name: PhaseStats()
+            for name in PHASES
+        }
+
+        self.phase_stack: List[Phase] = []
+        self.qt_objects: Deque[Tuple[float, int]] = deque(maxlen=QT_OBJECTS_HISTORY_LENGTH)
+
+        self.games: int = 0
+        self.game_snapshot: Union[tracemalloc.Snapshot, None] = None
+        self.game_qt_objects: int = 0
+        self.null_phase: ContextManager = nullcontext()
+
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    def phase(self, name: str) -> ContextManager:
+        if not self.enabled:
+            return self.null_phase
+
+        return Phase(self.phases[name], self.phase_stack)
+
+    def sample_qt_objects(self, root: QObject) -> int:
+        count: int = len(root.findChildren(QObject))
+
+        self.qt_objects.append((monotonic(), count))
+
+        return count
+
+    def game_started(self, root: QObject) -> None:
+        if not self.enabled:
+            return
+
+        snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ))
+
+        qt_objects: int = self.sample_qt_objects(root)
+
+        if self.game_snapshot is not None:
+            stats: List[tracemalloc.StatisticDiff] = snapshot.compare_to(self.game_snapshot, "lineno")
+            growth: int = sum(stat.size_diff for stat in stats)
+
+            if growth > GROWTH_WARNING_BYTES or qt_objects > self.game_qt_objects:
+                print(
+                    f"[memory] game {self.games}: +{growth} bytes, "
+                    f"Qt objects {self.game_qt_objects} -> {qt_objects}",
+                    file = stderr
+                )
+
+                for stat in stats[:TOP_GROWTH_STATS]:
+                    print(f"[memory]   {stat}", file=stderr)
+
+        self.games += 1
+        self.game_snapshot = snapshot
+        self.game_qt_objects = qt_objects
+
+    def report(self) -> str:
+        lines: List[str] = [
+            f"{'phase':<8}{'calls':>10}{'allocated':>14}{'allocated/call':>16}{'net blocks':>12}{'net bytes':>14}"
+        ]
+
+        for name, stats in self.phases.items():
+            lines.append(
+                f"{name:<8}{stats.calls:>10}{stats.allocated:>14}"
+                f"{stats.allocated / max(stats.calls, 1):>16.1f}{stats.blocks:>12}{stats.bytes:>14}"
+            )
+
+        if self.qt_objects:
+            lines.append(
+                f"Qt objects: first {self.qt_objects[0][1]}, last {self.qt_objects[-1][1]}, "
+                f"max {max(count for _, count in self.qt_objects)}"
+            )
+
+        current, peak = tracemalloc.get_traced_memory()
+        lines.append(f"traced memory: current {current} bytes, peak {peak} bytes")
+
+        return "\n".join(lines)
+
+    def print_report(self) -> None:
+        if not self.enabled:
+            return
+
+        print(self.report(), file=stderr)
+
+        for stats in self.phases.values():
+            stats.reset()
+
+
+def measure(name: str) -> Callable[[Callable], Callable]:
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.diagnostics.phase(name):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,15 +1,25 @@
-from PyQt5.QtCore import Qt, QBasicTimer, pyqtBoundSignal, pyqtSignal, QRect, QTimerEvent, QSize, QObject
-from PyQt5.QtGui import QPainter, QColor, QKeyEvent, QPaintEvent, QIcon, QFontDatabase, QFont, QClipboard
-from PyQt5.QtWidgets import QMainWindow, QFrame, QDesktopWidget, QApplication, QMessageBox
+from PyQt5.QtCore import Qt, QBasicTimer, pyqtBoundSignal, pyqtSignal, QRect, QTimerEvent, QSize, QObject, QTimer
+from PyQt5.QtGui import QPainter, QColor, QKeyEvent, QPaintEvent, QResizeEvent, QIcon, QFontDatabase, QFont, QClipboard, QKeySequence
+from PyQt5.QtWidgets import QMainWindow, QFrame, QDesktopWidget, QApplication, QMessageBox, QWidget, QShortcut
 from PyQt5.QtMultimedia import QSound
 
 from pydantic import BaseModel, Field as ModelField
 from simplejson import load as load_json, dump as dump_json
-from random import randint
+from random import randint, choice
+from argparse import ArgumentParser, Namespace
+from functools import partial
+from math import ceil, sqrt
 
 from ui import Ui_MainWindow
+from diagnostics import MemoryDiagnostics, measure
+from history import BoardHistory
+from metrics import BoardMetrics
+from render import BoardRenderer, RenderRequest, draw_square
+from profiler import SamplingProfiler
+from dataset import DatasetExporter
+from spectator import SpectatorPublisher, SpectatorClient, SpectatorState, DEFAULT_SPECTATOR_HOST
 
-from typing import Union, List, Tuple
+from typing import Union, List, Tuple, Dict
 
 
 class Assets:
@@ -21,15 +31,78 @@ class Assets:
         game_over: QSound
 
 
+def add_profiler_shortcut(parent: QWidget, profiler: SamplingProfiler, profile_path: str) -> None:
+    def toggle_profiler() -> None:
+        try:
+            if profiler.toggle(profile_path):
+                print("Profiler started")
+
+            else:
+                print(f"Profile saved to {profile_path}")
+
+        except OSError as error:
+            print(f"Can't save profile to {profile_path}: {error}")
+
+    QShortcut(QKeySequence(Qt.Key_F9), parent, toggle_profiler)
+
+
+def load_assets(parent: QObject) -> None:
+    try:
+        Assets.font = QFont(
+            QFontDatabase.applicationFontFamilies(
+                QFontDatabase.addApplicationFont("assets/fonts/FiraMono-Medium.ttf")
+            )[0]
+        )
+
+    except IndexError:
+        pass
+
+    Assets.sounds.drop = QSound("assets/sounds/drop.wav", parent)
+    Assets.sounds.line_clear = QSound("assets/sounds/line_clear.wav", parent)
+    Assets.sounds.game_over = QSound("assets/sounds/game_over.wav", parent)
+
+
 class Statuses:
     in_game: str = "In game"
     paused: str = "Paused"
     game_over: str = "Game Over!"
+    disconnected: str = "Disconnected"
 
 
 GAME_DATA_FILENAME: str = "data"
 GAME_DATA_FILE_ENCODING: str = "utf-8"
 
+QT_OBJECTS_SAMPLE_INTERVAL: int = 5000
+
+PROFILE_FILENAME: str = "profile.speedscope.json"
+
+SPECTATOR_POLL_INTERVAL: int = 100
+SPECTATOR_VIEW_INTERVAL: int = 16
+SPECTATOR_WINDOW_SIZE: QSize = QSize(250, 550)
+
+VERSUS_MIN_BOARDS: int = 2
+VERSUS_MAX_BOARDS: int = 16
+VERSUS_HEADER_HEIGHT: int = 20
+VERSUS_BOARD_MARGIN: int = 6
+VERSUS_CELL_SIZE: QSize = QSize(120, 260)
+
+PLAYER_KEY_MAPS: List[Dict[int, int]] = [
+    {
+        Qt.Key_Left: Qt.Key_Left,
+        Qt.Key_Right: Qt.Key_Right,
+        Qt.Key_Down: Qt.Key_Down,
+        Qt.Key_Up: Qt.Key_Up,
+        Qt.Key_Return: Qt.Key_Space
+    },
+    {
+        Qt.Key_A: Qt.Key_Left,
+        Qt.Key_D: Qt.Key_Right,
+        Qt.Key_S: Qt.Key_Down,
+        Qt.Key_W: Qt.Key_Up,
+        Qt.Key_Space: Qt.Key_Space
+    }
+]
+
 
 class GameData(BaseModel):
     class Config:
@@ -64,27 +137,29 @@ game_data: GameData = GameData(
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, clipboard: QClipboard):
+    def __init__(
+        self,
+        clipboard: QClipboard,
+        diagnostics: MemoryDiagnostics,
+        profiler: SamplingProfiler,
+        profile_path: str,
+        exporter: Union[DatasetExporter, None] = None,
+        spectator: Union[SpectatorPublisher, None] = None
+    ):
         super(MainWindow, self).__init__()
 
         self.ui: Ui_MainWindow = Ui_MainWindow()
         self.ui.setupUi(self)
 
         self.clipboard: QClipboard = clipboard
+        self.diagnostics: MemoryDiagnostics = diagnostics
 
-        try:
-            Assets.font = QFont(
-                QFontDatabase.applicationFontFamilies(
-                    QFontDatabase.addApplicationFont("assets/fonts/FiraMono-Medium.ttf")
-                )[0]
-            )
+        add_profiler_shortcut(self, profiler, profile_path)
 
-        except IndexError:
-            pass
+        self.renderer: BoardRenderer = BoardRenderer(self)
+        self.renderer.start()
 
-        Assets.sounds.drop = QSound("assets/sounds/drop.wav", self)
-        Assets.sounds.line_clear = QSound("assets/sounds/line_clear.wav", self)
-        Assets.sounds.game_over = QSound("assets/sounds/game_over.wav", self)
+        load_assets(self)
 
         if Assets.font:
             for ui_el_name in dir(self.ui):
@@ -95,7 +170,11 @@ class MainWindow(QMainWindow):
         self.setIconSize(QSize(32, 32))
 
         self.game_board: GameBoard = GameBoard(
-            frame = self.ui.gameFrame
+            frame = self.ui.gameFrame,
+            diagnostics = self.diagnostics,
+            renderer = self.renderer,
+            exporter = exporter,
+            spectator = spectator
         )
 
         self.game_board.status_slot.connect(self.handle_status_signal)
@@ -116,7 +195,17 @@ class MainWindow(QMainWindow):
 
         self.ui.maxScoreLineEdit.setText(str(game_data.max_points))
 
-        self.game_board.start()
+        if self.diagnostics.enabled:
+            self.qt_objects_timer: QTimer = QTimer(self)
+            self.qt_objects_timer.timeout.connect(self.handle_qt_objects_timer)
+            self.qt_objects_timer.start(QT_OBJECTS_SAMPLE_INTERVAL)
+
+        if spectator is not None:
+            self.spectator_timer: QTimer = QTimer(self)
+            self.spectator_timer.timeout.connect(spectator.poll)
+            self.spectator_timer.start(SPECTATOR_POLL_INTERVAL)
+
+        self.start_game()
 
         screen: QRect = QDesktopWidget().screenGeometry()
         size: QRect = self.geometry()
@@ -130,9 +219,22 @@ class MainWindow(QMainWindow):
 
         self.show()
 
+    def start_game(self) -> None:
+        if self.game_board.is_paused:
+            return
+
+        self.diagnostics.game_started(self)
+        self.game_board.start()
+
+    def handle_qt_objects_timer(self) -> None:
+        self.diagnostics.sample_qt_objects(self)
+
     def handle_status_signal(self, status_text: str) -> None:
         self.ui.statusLineEdit.setText(status_text)
 
+        if status_text == Statuses.game_over:
+            self.diagnostics.print_report()
+
     def handle_max_score_signal(self, max_score: int) -> None:
         self.ui.maxScoreLineEdit.setText(str(max_score))
 
@@ -145,7 +247,7 @@ class MainWindow(QMainWindow):
     def handler_restart_button_clicked(self) -> None:
         game_data.save()
 
-        self.game_board.start()
+        self.start_game()
 
     def handler_share_scores_button_clicked(self) -> None:
         max_scores: int = int(self.ui.maxScoreLineEdit.text())
@@ -155,19 +257,321 @@ class MainWindow(QMainWindow):
         self.clipboard.setText(f"Your results in Tetris:\n\nMax score - {max_scores}\nLast score - {last_scores}")
 
         message_box: QMessageBox = QMessageBox(self)
+        message_box.setAttribute(Qt.WA_DeleteOnClose)
         message_box.setWindowTitle(self.windowTitle())
         message_box.setText("Results was copied!")
         message_box.exec()
 
 
+class SpectatorWindow(QMainWindow):
+    def __init__(self, diagnostics: MemoryDiagnostics, client: SpectatorClient):
+        super(SpectatorWindow, self).__init__()
+
+        self.client: SpectatorClient = client
+        self.board_version: int = 0
+
+        self.setWindowTitle("Tetris - spectating")
+        self.setWindowIcon(QIcon("assets/images/tetris.png"))
+
+        self.renderer: BoardRenderer = BoardRenderer(self)
+        self.renderer.start()
+
+        self.frame: QFrame = QFrame(self)
+        self.frame.setStyleSheet("border: 1px solid black;")
+        self.setCentralWidget(self.frame)
+
+        self.game_board: GameBoard = GameBoard(
+            frame = self.frame,
+            diagnostics = diagnostics,
+            renderer = self.renderer
+        )
+
+        self.game_board.current_piece = Shape()
+        self.game_board.clear_board()
+
+        self.poll_timer: QTimer = QTimer(self)
+        self.poll_timer.timeout.connect(self.handle_poll_timer)
+        self.poll_timer.start(SPECTATOR_VIEW_INTERVAL)
+
+        self.resize(SPECTATOR_WINDOW_SIZE)
+        self.show()
+
+    def handle_poll_timer(self) -> None:
+        if not self.client.poll():
+            if not self.client.is_connected:
+                self.poll_timer.stop()
+                self.setWindowTitle(f"Tetris - {Statuses.disconnected}")
+
+            return
+
+        state: SpectatorState = self.client.state
+
+        if not state.is_synced:
+            return
+
+        game_board: GameBoard = self.game_board
+
+        if state.board_version != self.board_version:
+            self.board_version = state.board_version
+
+            game_board.board = list(state.board)
+            game_board.request_render()
+
+        piece: Shape = Shape()
+        piece.set_shape(
+            shape = state.shape
+        )
+
+        for i, (x, y) in enumerate(state.coords):
+            piece.set_x(i, x)
+            piece.set_y(i, y)
+
+        game_board.current_piece = piece
+        game_board.current_x = state.x
+        game_board.current_y = state.y
+        game_board.update()
+
+        self.setWindowTitle(f"Tetris - spectating: {state.lines}")
+
+
+class VersusPlayer:
+    def __init__(self, name: str, game_board: 'GameBoard', key_map: Union[Dict[int, int], None]) -> None:
+        self.name: str = name
+        self.game_board: GameBoard = game_board
+        self.key_map: Union[Dict[int, int], None] = key_map
+        self.cell: QRect = QRect()
+
+
+class VersusWindow(QMainWindow):
+    def __init__(
+        self,
+        diagnostics: MemoryDiagnostics,
+        profiler: SamplingProfiler,
+        profile_path: str,
+        boards: int,
+        bots: int,
+        exporter: Union[DatasetExporter, None] = None
+    ):
+        super(VersusWindow, self).__init__()
+
+        self.diagnostics: MemoryDiagnostics = diagnostics
+
+        add_profiler_shortcut(self, profiler, profile_path)
+
+        load_assets(self)
+
+        self.setWindowTitle("Tetris")
+        self.setWindowIcon(QIcon("assets/images/tetris.png"))
+
+        self.renderer: BoardRenderer = BoardRenderer(self)
+        self.renderer.start()
+
+        self.scheduler: BoardScheduler = BoardScheduler(self)
+
+        self.surface: QWidget = QWidget(self)
+        self.surface.setFocusPolicy(Qt.StrongFocus)
+        self.surface.paintEvent = self.surface_paint_event
+        self.surface.resizeEvent = self.surface_resize_event
+        self.surface.keyPressEvent = self.surface_key_press_event
+
+        self.setCentralWidget(self.surface)
+
+        self.message: str = ""
+        self.is_match_over: bool = False
+        self.players: List[VersusPlayer] = []
+
+        index: int
+
+        for index in range(boards):
+            is_bot: bool = index >= boards - bots
+
+            game_board: GameBoard = GameBoard(
+                frame = self.surface,
+                diagnostics = self.diagnostics,
+                renderer = self.renderer,
+                scheduler = self.scheduler,
+                records_score = False,
+                exporter = exporter
+            )
+
+            player: VersusPlayer = VersusPlayer(
+                name = f"Bot {index + 1}" if is_bot else f"P{index + 1}",
+                game_board = game_board,
+                key_map = None if is_bot else PLAYER_KEY_MAPS[index]
+            )
+
+            if is_bot:
+                self.scheduler.add_bot(Bot(game_board))
+
+            game_board.status_slot.connect(partial(self.handle_status_signal, player))
+            game_board.last_score_slot.connect(partial(self.handle_last_score_signal, player))
+            game_board.lines_removed_slot.connect(partial(self.handle_lines_removed_signal, player))
+
+            self.players.append(player)
+
+        columns: int
+        rows: int
+
+        columns, rows = self.grid_size()
+
+        self.resize(VERSUS_CELL_SIZE.width() * columns, VERSUS_CELL_SIZE.height() * rows)
+
+        if self.diagnostics.enabled:
+            self.qt_objects_timer: QTimer = QTimer(self)
+            self.qt_objects_timer.timeout.connect(self.handle_qt_objects_timer)
+            self.qt_objects_timer.start(QT_OBJECTS_SAMPLE_INTERVAL)
+
+        self.restart()
+
+        self.show()
+        self.surface.setFocus()
+
+    def grid_size(self) -> Tuple[int, int]:
+        columns: int = min(len(self.players), max(1, round(sqrt(len(self.players) * 2))))
+
+        return columns, ceil(len(self.players) / columns)
+
+    def restart(self) -> None:
+        self.message = ""
+        self.is_match_over = False
+        self.diagnostics.game_started(self)
+
+        for player in self.players:
+            player.game_board.start()
+
+        self.scheduler.start()
+        self.surface.update()
+
+    def handle_qt_objects_timer(self) -> None:
+        self.diagnostics.sample_qt_objects(self)
+
+    def handle_status_signal(self, player: VersusPlayer, status_text: str) -> None:
+        self.surface.update(player.cell)
+
+        if status_text != Statuses.game_over or self.is_match_over:
+            return
+
+        alive: List[VersusPlayer] = [
+            alive_player
+            for alive_player in self.players
+            if alive_player.game_board.is_started
+        ]
+
+        if len(alive) > 1:
+            return
+
+        self.is_match_over = True
+        self.scheduler.stop()
+        self.diagnostics.print_report()
+
+        if alive:
+            self.message = f"{alive[0].name} wins!\nF2 - restart"
+
+        else:
+            self.message = f"{Statuses.game_over}\nF2 - restart"
+
+        self.surface.update()
+
+    def handle_last_score_signal(self, player: VersusPlayer, last_score: int) -> None:
+        self.surface.update(player.cell)
+
+    def handle_lines_removed_signal(self, player: VersusPlayer, num_lines: int) -> None:
+        garbage: int = num_lines if num_lines >= 4 else num_lines - 1
+
+        opponents: List[VersusPlayer] = [
+            opponent
+            for opponent in self.players
+            if opponent is not player and opponent.game_board.is_started
+        ]
+
+        if garbage > 0 and opponents:
+            choice(opponents).game_board.add_garbage(garbage)
+
+    def surface_resize_event(self, event: QResizeEvent) -> None:
+        columns: int
+        rows: int
+
+        columns, rows = self.grid_size()
+
+        width: int = self.surface.width() // columns
+        height: int = self.surface.height() // rows
+
+        index: int
+        player: VersusPlayer
+
+        for index, player in enumerate(self.players):
+            x: int = (index % columns) * width
+            y: int = (index // columns) * height
+
+            player.cell = QRect(x, y, width, height)
+            player.game_board.area = QRect(
+                x + VERSUS_BOARD_MARGIN,
+                y + VERSUS_HEADER_HEIGHT,
+                width - 2 * VERSUS_BOARD_MARGIN,
+                height - VERSUS_HEADER_HEIGHT - VERSUS_BOARD_MARGIN
+            )
+
+    @measure("paint")
+    def surface_paint_event(self, event: QPaintEvent) -> None:
+        painter: QPainter = QPainter(self.surface)
+
+        if Assets.font:
+            painter.setFont(Assets.font)
+
+        for player in self.players:
+            if not event.region().intersects(player.cell):
+                continue
+
+            game_board: GameBoard = player.game_board
+            status: str = "" if game_board.is_started else f" - {Statuses.game_over}"
+
+            painter.setPen(QColor(Qt.darkGray))
+            painter.drawRect(game_board.board_rect().adjusted(-1, -1, 0, 0))
+
+            painter.setPen(QColor(Qt.black))
+            painter.drawText(
+                player.cell.adjusted(VERSUS_BOARD_MARGIN, 0, -VERSUS_BOARD_MARGIN, 0),
+                Qt.AlignLeft | Qt.AlignTop,
+                f"{player.name}: {game_board.num_lines_removed}{status}"
+            )
+
+            game_board.paint(painter)
+
+        if self.message:
+            painter.setPen(QColor(Qt.black))
+            painter.drawText(self.surface.rect(), Qt.AlignCenter, self.message)
+
+    def surface_key_press_event(self, event: QKeyEvent) -> None:
+        key: int = event.key()
+
+        if key == Qt.Key_F2:
+            self.restart()
+            return
+
+        if key == Qt.Key_P:
+            self.scheduler.pause()
+            self.message = Statuses.paused if self.scheduler.is_paused else ""
+            self.surface.update()
+            return
+
+        if self.scheduler.is_paused:
+            return
+
+        for player in self.players:
+            if player.key_map is not None and key in player.key_map:
+                player.game_board.handle_key(player.key_map[key])
+
+
 class GameBoard(QObject):
     status_slot: pyqtBoundSignal = pyqtSignal(str)
     max_score_slot: pyqtBoundSignal = pyqtSignal(int)
     last_score_slot: pyqtBoundSignal = pyqtSignal(int)
+    lines_removed_slot: pyqtBoundSignal = pyqtSignal(int)
 
     BASE_SQUARE_WIDTH: int = 10
     BASE_SQUARE_HEIGHT: int = 22
     SPEED: int = 300
+    HISTORY_LENGTH: int = 1000
 
     COLOR_TABLE: List[int] = [
         0x000000,
@@ -177,28 +581,80 @@ class GameBoard(QObject):
         0xCCCC66,
         0xCC66CC,
         0x66CCCC,
-        0xDAAA00
+        0xDAAA00,
+        0x808080
     ]
 
-    def __init__(self, frame: QFrame) -> None:
+    def __init__(
+        self,
+        frame: QFrame,
+        diagnostics: MemoryDiagnostics,
+        renderer: BoardRenderer,
+        scheduler: Union['BoardScheduler', None] = None,
+        records_score: bool = True,
+        exporter: Union[DatasetExporter, None] = None,
+        spectator: Union[SpectatorPublisher, None] = None
+    ) -> None:
         super(GameBoard, self).__init__()
 
+        self.exporter: Union[DatasetExporter, None] = exporter
+        self.spectator: Union[SpectatorPublisher, None] = spectator
+
+        self.scheduler: Union[BoardScheduler, None] = scheduler
+        self.records_score: bool = records_score
+        self.area: Union[QRect, None] = None
+
+        self.diagnostics: MemoryDiagnostics = diagnostics
+
+        self.renderer: BoardRenderer = renderer
+        self.renderer.rendered.connect(self.handle_rendered)
+        self.board_generation: int = 0
+        self.base_generation: int = 0
+        self.locked_cells: List[Tuple[int, int, int, int]] = []
+        self.render_size: Tuple[int, int] = (0, 0)
+
+        self.colors: List[Tuple[QColor, QColor, QColor]] = []
+
+        for color_value in self.COLOR_TABLE:
+            color: QColor = QColor(color_value)
+            self.colors.append((color, color.lighter(), color.darker()))
+
         self.timer: QBasicTimer = QBasicTimer()
         self.is_waiting_after_line: bool = False
 
         self.current_x: int = 0
         self.current_y: int = 0
         self.num_lines_removed: int = 0
+        self.num_pieces: int = 0
+        self.pending_garbage: int = 0
         self.board: List[int] = []
+        self.removed_rows: List[int] = []
+
+        self.history: BoardHistory = BoardHistory(
+            width = self.BASE_SQUARE_WIDTH,
+            height = self.BASE_SQUARE_HEIGHT,
+            max_length = self.HISTORY_LENGTH,
+            empty = Tetrominoe.NoShape
+        )
+
+        self.metrics: BoardMetrics = BoardMetrics(
+            width = self.BASE_SQUARE_WIDTH,
+            height = self.BASE_SQUARE_HEIGHT,
+            empty = Tetrominoe.NoShape
+        )
 
         self.frame: QFrame = frame
 
         self.is_started: bool = False
         self.is_paused: bool = False
 
-        self.frame.paintEvent = self.paintEvent
-        self.frame.keyPressEvent = self.keyPressEvent
-        self.frame.timerEvent = self.timerEvent
+        if self.scheduler is None:
+            self.frame.paintEvent = self.paintEvent
+            self.frame.keyPressEvent = self.keyPressEvent
+            self.frame.timerEvent = self.timerEvent
+
+        else:
+            self.scheduler.add(self)
 
         self.current_piece: Shape
 
@@ -208,11 +664,28 @@ class GameBoard(QObject):
     def set_shape_at(self, x: int, y: int, shape: int) -> None:
         self.board[(y * self.BASE_SQUARE_WIDTH) + x] = shape
 
+    def board_rect(self) -> QRect:
+        if self.area is not None:
+            return self.area
+
+        return self.frame.contentsRect()
+
     def square_width(self) -> int:
-        return self.frame.contentsRect().width() // self.BASE_SQUARE_WIDTH
+        return self.board_rect().width() // self.BASE_SQUARE_WIDTH
 
     def square_height(self) -> int:
-        return self.frame.contentsRect().height() // self.BASE_SQUARE_HEIGHT
+        return self.board_rect().height() // self.BASE_SQUARE_HEIGHT
+
+    def update(self) -> None:
+        self.frame.update(self.board_rect())
+
+    def start_timer(self) -> None:
+        if self.scheduler is None:
+            self.timer.start(self.SPEED, self)
+
+    def stop_timer(self) -> None:
+        if self.scheduler is None:
+            self.timer.stop()
 
     def start(self) -> None:
         if self.is_paused:
@@ -222,22 +695,26 @@ class GameBoard(QObject):
         self.is_paused = False
         self.is_waiting_after_line = False
         self.num_lines_removed = 0
+        self.num_pieces = 0
+        self.pending_garbage = 0
 
         self.current_x = 0
         self.current_y = 0
         self.board = []
 
         self.clear_board()
+        self.history.reset(self.board)
+        self.metrics.reset(self.board)
+        self.request_render()
 
         self.status_slot.emit(Statuses.in_game)
         self.last_score_slot.emit(0)
 
         self.new_piece()
+        self.publish_keyframe()
 
-        if self.timer.isActive():
-            self.timer.stop()
-
-        self.timer.start(self.SPEED, self)
+        self.stop_timer()
+        self.start_timer()
 
     def pause(self) -> None:
         if not self.is_started:
@@ -246,40 +723,75 @@ class GameBoard(QObject):
         self.is_paused = not self.is_paused
 
         if self.is_paused:
-            self.timer.stop()
+            self.stop_timer()
             self.status_slot.emit(Statuses.paused)
 
         else:
-            self.timer.start(self.SPEED, self)
+            self.start_timer()
             self.status_slot.emit(Statuses.in_game)
 
-        self.frame.update()
+        self.update()
 
+    @measure("paint")
     def paintEvent(self, event: QPaintEvent) -> None:
         painter: QPainter = QPainter(self.frame)
 
-        rect: QRect = self.frame.contentsRect()
+        self.paint(painter)
+
+    def paint(self, painter: QPainter) -> None:
+        rect: QRect = self.board_rect()
 
         board_top: int = rect.bottom() - self.BASE_SQUARE_HEIGHT * self.square_height()
 
         i: int
         j: int
 
-        for i in range(self.BASE_SQUARE_HEIGHT):
-            for j in range(self.BASE_SQUARE_WIDTH):
-                shape: int = self.get_shape_at(
-                    x = j,
-                    y = self.BASE_SQUARE_HEIGHT - i - 1
+        layer_generation: Union[int, None] = self.renderer.blit(
+            key = self,
+            painter = painter,
+            x = rect.left(),
+            y = board_top,
+            width = self.BASE_SQUARE_WIDTH * self.square_width(),
+            height = self.BASE_SQUARE_HEIGHT * self.square_height(),
+            min_generation = self.base_generation
+        )
+
+        if layer_generation is not None:
+            # NOTE: the layer may be older than the board, redraw the cells
+            # locked since it was requested until the worker catches up.
+            self.locked_cells = [
+                cell
+                for cell in self.locked_cells
+                if cell[0] > layer_generation
+            ]
+
+            for _, x, y, shape in self.locked_cells:
+                self.draw_square(
+                    painter = painter,
+                    x = rect.left() + x * self.square_width(),
+                    y = board_top + (self.BASE_SQUARE_HEIGHT - y - 1) * self.square_height(),
+                    shape = shape
                 )
 
-                if shape != Tetrominoe.NoShape:
-                    self.draw_square(
-                        painter = painter,
-                        x = rect.left() + j * self.square_width(),
-                        y = board_top + i * self.square_height(),
-                        shape = shape
+        else:
+            if self.render_size != (self.square_width(), self.square_height()):
+                self.request_render()
+
+            for i in range(self.BASE_SQUARE_HEIGHT):
+                for j in range(self.BASE_SQUARE_WIDTH):
+                    shape: int = self.get_shape_at(
+                        x = j,
+                        y = self.BASE_SQUARE_HEIGHT - i - 1
                     )
 
+                    if shape != Tetrominoe.NoShape:
+                        self.draw_square(
+                            painter = painter,
+                            x = rect.left() + j * self.square_width(),
+                            y = board_top + i * self.square_height(),
+                            shape = shape
+                        )
+
         if self.current_piece.shape() != Tetrominoe.NoShape:
             for i in range(4):
                 self.draw_square(
@@ -290,10 +802,16 @@ class GameBoard(QObject):
                 )
 
     def keyPressEvent(self, event: QKeyEvent) -> None:
-        if not self.is_started or self.current_piece.shape() == Tetrominoe.NoShape:
+        self.handle_key(event.key())
+
+    @measure("input")
+    def handle_key(self, key: int) -> None:
+        if key == Qt.Key_Backspace:
+            self.undo()
             return
 
-        key: int = event.key()
+        if not self.is_started or self.current_piece.shape() == Tetrominoe.NoShape:
+            return
 
         if key == Qt.Key_P:
             self.pause()
@@ -338,12 +856,80 @@ class GameBoard(QObject):
 
     def timerEvent(self, event: QTimerEvent) -> None:
         if event.timerId() == self.timer.timerId():
-            if self.is_waiting_after_line:
-                self.is_waiting_after_line = False
-                self.new_piece()
+            self.tick()
 
-            else:
-                self.one_line_down()
+    @measure("tick")
+    def tick(self) -> None:
+        if self.spectator is not None and self.spectator.is_keyframe_due():
+            self.publish_keyframe()
+
+        if self.is_waiting_after_line:
+            self.is_waiting_after_line = False
+            self.new_piece()
+
+        else:
+            self.one_line_down()
+
+        if self.spectator is not None:
+            self.spectator.flush_all()
+
+    def request_render(self, locked_cells: Union[List[Tuple[int, int]], None] = None, shape: int = 0) -> None:
+        self.board_generation += 1
+
+        if locked_cells is None or self.render_size != (self.square_width(), self.square_height()):
+            self.base_generation = self.board_generation
+            self.locked_cells = []
+
+        else:
+            self.locked_cells.extend(
+                (self.board_generation, x, y, shape)
+                for x, y in locked_cells
+            )
+
+        self.render_size = (self.square_width(), self.square_height())
+
+        self.renderer.request(
+            key = self,
+            request = RenderRequest(
+                cells = tuple(self.board),
+                columns = self.BASE_SQUARE_WIDTH,
+                rows = self.BASE_SQUARE_HEIGHT,
+                square_width = self.square_width(),
+                square_height = self.square_height(),
+                colors = self.colors,
+                generation = self.board_generation
+            )
+        )
+
+    def publish_keyframe(self) -> None:
+        if self.spectator is None:
+            return
+
+        self.spectator.keyframe(
+            board = self.board,
+            width = self.BASE_SQUARE_WIDTH,
+            height = self.BASE_SQUARE_HEIGHT,
+            lines = self.num_lines_removed,
+            shape = self.current_piece.shape(),
+            x = self.current_x,
+            y = self.current_y,
+            coords = self.current_piece.coords
+        )
+
+    def publish_piece(self) -> None:
+        if self.spectator is None:
+            return
+
+        self.spectator.piece(
+            shape = self.current_piece.shape(),
+            x = self.current_x,
+            y = self.current_y,
+            coords = self.current_piece.coords
+        )
+
+    def handle_rendered(self, key: QObject) -> None:
+        if key is self:
+            self.update()
 
     def clear_board(self) -> None:
         self.board = [
@@ -354,16 +940,19 @@ class GameBoard(QObject):
     def drop_down(self) -> None:
         new_y: int = self.current_y
 
-        while new_y > 0:
-            if not self.try_move(
-                new_piece = self.current_piece,
-                new_x = self.current_x,
-                new_y = new_y - 1
-            ):
-                break
-
+        while new_y > 0 and self.fits(
+            piece = self.current_piece,
+            new_x = self.current_x,
+            new_y = new_y - 1
+        ):
             new_y -= 1
 
+        self.try_move(
+            new_piece = self.current_piece,
+            new_x = self.current_x,
+            new_y = new_y
+        )
+
         self.piece_dropped()
 
     def one_line_down(self) -> None:
@@ -374,61 +963,104 @@ class GameBoard(QObject):
         ):
             self.piece_dropped()
 
+    @measure("lock")
     def piece_dropped(self) -> None:
         Assets.sounds.drop.play()
 
+        shape: int = self.current_piece.shape()
+        cells: List[Tuple[int, int]] = []
+        num_lines_removed: int = self.num_lines_removed
+
+        if self.exporter is not None:
+            state: bytes = bytes(self.board)
+            coords: Tuple[Tuple[int, int], ...] = tuple(map(tuple, self.current_piece.coords))
+
         i: int
 
         for i in range(4):
+            x: int = self.current_x + self.current_piece.x(i)
+            y: int = self.current_y - self.current_piece.y(i)
+
             self.set_shape_at(
-                x = self.current_x + self.current_piece.x(i),
-                y = self.current_y - self.current_piece.y(i),
-                shape = self.current_piece.shape()
+                x = x,
+                y = y,
+                shape = shape
+            )
+
+            cells.append((x, y))
+
+        self.metrics.lock(cells)
+
+        if self.spectator is not None:
+            self.spectator.lock(
+                shape = shape,
+                cells = cells
             )
 
         self.remove_full_lines()
 
+        if self.exporter is not None:
+            try:
+                self.exporter.record(
+                    board = state,
+                    piece = shape,
+                    x = self.current_x,
+                    y = self.current_y,
+                    coords = coords,
+                    lines = self.num_lines_removed - num_lines_removed
+                )
+
+            except OSError as error:
+                print(f"Can't export dataset, export stopped: {error}")
+                self.exporter = None
+
+        self.history.record(
+            board = self.board,
+            lines = self.num_lines_removed,
+            piece = shape,
+            changed_rows = [y for _, y in cells],
+            removed_rows = self.removed_rows
+        )
+
+        if self.removed_rows or self.pending_garbage:
+            if self.pending_garbage:
+                self.add_garbage_rows()
+
+            self.request_render()
+
+        else:
+            self.request_render(
+                locked_cells = cells,
+                shape = shape
+            )
+
+        if not self.is_started:
+            return
+
         if self.is_waiting_after_line:
             Assets.sounds.line_clear.play()
         else:
             self.new_piece()
 
+    @measure("clear")
     def remove_full_lines(self) -> bool:
         num_full_lines: int = 0
-        rows_to_remove: List[int] = []
-
-        i: int
-
-        for i in range(self.BASE_SQUARE_HEIGHT):
-            n: int = 0
-
-            for j in range(self.BASE_SQUARE_WIDTH):
-                if not self.get_shape_at(
-                    x = j,
-                    y = i
-                ) == Tetrominoe.NoShape:
-                    n += 1
-
-            if n == 10:
-                rows_to_remove.append(i)
+        rows_to_remove: List[int] = self.metrics.full_rows()
 
         rows_to_remove.reverse()
+        self.removed_rows = rows_to_remove
 
         i: int
-        x: int
-        y: int
 
         for i in rows_to_remove:
-            for y in range(i, self.BASE_SQUARE_HEIGHT):
-                for x in range(self.BASE_SQUARE_WIDTH):
-                    self.set_shape_at(
-                        x = x,
-                        y = y,
-                        shape = self.get_shape_at(
-                            x = x,
-                            y = y + 1
-                        )
-                    )
+            del self.board[i * self.BASE_SQUARE_WIDTH:(i + 1) * self.BASE_SQUARE_WIDTH]
+
+            self.board.extend([Tetrominoe.NoShape] * self.BASE_SQUARE_WIDTH)
+
+        self.metrics.clear(
+            rows = rows_to_remove,
+            board = self.board
+        )
 
         num_full_lines += len(rows_to_remove)
 
@@ -437,7 +1069,49 @@ class GameBoard(QObject):
             self.last_score_slot.emit(self.num_lines_removed)
             self.is_waiting_after_line = True
             self.current_piece.set_shape(Tetrominoe.NoShape)
-            self.frame.update()
+            self.lines_removed_slot.emit(num_full_lines)
+            self.update()
+
+            if self.spectator is not None:
+                self.spectator.clear(
+                    rows = rows_to_remove,
+                    lines = self.num_lines_removed
+                )
+
+    def add_garbage(self, count: int) -> None:
+        self.pending_garbage += count
+
+    def add_garbage_rows(self) -> None:
+        count: int = min(self.pending_garbage, self.BASE_SQUARE_HEIGHT)
+        garbage: List[int] = []
+
+        for _ in range(count):
+            row: List[int] = [Tetrominoe.GarbageShape] * self.BASE_SQUARE_WIDTH
+            row[randint(0, self.BASE_SQUARE_WIDTH - 1)] = Tetrominoe.NoShape
+
+            garbage.extend(row)
+
+        self.pending_garbage = 0
+
+        is_topped_out: bool = any(
+            shape != Tetrominoe.NoShape
+            for shape in self.board[len(self.board) - len(garbage):]
+        )
+
+        self.board = garbage + self.board[:len(self.board) - len(garbage)]
+        self.metrics.reset(self.board)
+
+        self.history.record(
+            board = self.board,
+            lines = self.num_lines_removed,
+            piece = Tetrominoe.NoShape,
+            changed_rows = range(self.BASE_SQUARE_HEIGHT)
+        )
+
+        self.publish_keyframe()
+
+        if is_topped_out:
+            self.game_over()
 
     def save_points(self) -> None:
         last_points: int = self.num_lines_removed
@@ -451,9 +1125,48 @@ class GameBoard(QObject):
 
         game_data.save()
 
-    def new_piece(self) -> None:
+    def undo(self, steps: int = 1) -> None:
+        if self.is_paused or len(self.history) <= 1:
+            return
+
+        self.rewind(
+            index = -1 - min(steps, len(self.history) - 1)
+        )
+
+    def rewind(self, index: int) -> None:
+        next_piece: Union[int, None]
+
+        self.board, self.num_lines_removed, next_piece = self.history.rewind(index)
+        self.metrics.reset(self.board)
+        self.is_waiting_after_line = False
+
+        self.last_score_slot.emit(self.num_lines_removed)
+
+        if not self.is_started:
+            self.is_started = True
+            self.status_slot.emit(Statuses.in_game)
+            self.start_timer()
+
+        self.new_piece(
+            shape = next_piece
+        )
+
+        self.publish_keyframe()
+        self.request_render()
+        self.update()
+
+    def new_piece(self, shape: Union[int, None] = None) -> None:
         self.current_piece: Shape = Shape()
-        self.current_piece.set_random_shape()
+        self.num_pieces += 1
+
+        if not shape:
+            self.current_piece.set_random_shape()
+
+        else:
+            self.current_piece.set_shape(
+                shape = shape
+            )
+
         self.current_x: int = self.BASE_SQUARE_WIDTH // 2 + 1
         self.current_y: int = self.BASE_SQUARE_HEIGHT - 1 + self.current_piece.min_y()
 
@@ -462,35 +1175,41 @@ class GameBoard(QObject):
             new_x = self.current_x,
             new_y = self.current_y
         ):
-            self.current_piece.set_shape(
-                shape = Tetrominoe.NoShape
-            )
+            self.game_over()
+
+    def game_over(self) -> None:
+        self.current_piece.set_shape(
+            shape = Tetrominoe.NoShape
+        )
+
+        self.publish_piece()
 
+        if self.records_score:
             self.save_points()
 
-            # NOTE: print board code:
-            # print(self.board, "\n")
-            # def chunker(items: list, n: int) -> List[list]:
-            #     return [
-            #         items[i:i + n]
-            #         for i in range(0, len(items), n)
-            #     ]
-            # for row in chunker(self.board, self.BASE_SQUARE_WIDTH)[::-1]:
-            #     print(*row, sep=" | ")
+        # NOTE: print board code:
+        # print(self.board, "\n")
+        # def chunker(items: list, n: int) -> List[list]:
+        #     return [
+        #         items[i:i + n]
+        #         for i in range(0, len(items), n)
+        #     ]
+        # for row in chunker(self.board, self.BASE_SQUARE_WIDTH)[::-1]:
+        #     print(*row, sep=" | ")
 
-            self.timer.stop()
-            self.is_started = False
+        self.stop_timer()
+        self.is_started = False
 
-            self.status_slot.emit(Statuses.game_over)
+        self.status_slot.emit(Statuses.game_over)
 
-            Assets.sounds.game_over.play()
+        Assets.sounds.game_over.play()
 
-    def try_move(self, new_piece: 'Shape', new_x: int, new_y: int) -> bool:
+    def fits(self, piece: 'Shape', new_x: int, new_y: int) -> bool:
         i: int
 
         for i in range(4):
-            x: int = new_x + new_piece.x(i)
-            y: int = new_y - new_piece.y(i)
+            x: int = new_x + piece.x(i)
+            y: int = new_y - piece.y(i)
 
             if x < 0 or x >= self.BASE_SQUARE_WIDTH or y < 0 or y >= self.BASE_SQUARE_HEIGHT:
                 return False
@@ -501,63 +1220,176 @@ class GameBoard(QObject):
             ) != Tetrominoe.NoShape:
                 return False
 
+        return True
+
+    def try_move(self, new_piece: 'Shape', new_x: int, new_y: int) -> bool:
+        if not self.fits(
+            piece = new_piece,
+            new_x = new_x,
+            new_y = new_y
+        ):
+            return False
+
         self.current_piece = new_piece
         self.current_x = new_x
         self.current_y = new_y
 
-        self.frame.update()
+        self.update()
+        self.publish_piece()
 
         return True
 
     def draw_square(self, painter: QPainter, x: int, y: int, shape: int) -> None:
-        color: QColor = QColor(self.COLOR_TABLE[shape])
+        draw_square(
+            painter = painter,
+            x = x,
+            y = y,
+            square_width = self.square_width(),
+            square_height = self.square_height(),
+            colors = self.colors[shape]
+        )
 
-        square_width: int = self.square_width()
-        square_height: int = self.square_height()
 
-        painter.fillRect(
-            x + 1,
-            y + 1,
-            square_width - 2,
-            square_height - 2,
-            color
-        )
+class BoardScheduler(QObject):
+    INTERVAL: int = 50
 
-        painter.setPen(
-            color.lighter()
-        )
+    def __init__(self, parent: Union[QObject, None] = None) -> None:
+        super(BoardScheduler, self).__init__(parent)
 
-        painter.drawLine(
-            x,
-            y + square_height - 1,
-            x,
-            y
-        )
+        self.timer: QBasicTimer = QBasicTimer()
+        self.boards: List[GameBoard] = []
+        self.bots: List[Bot] = []
 
-        painter.drawLine(
-            x,
-            y,
-            x + square_width - 1,
-            y
-        )
+        self.ticks: int = 0
+        self.is_paused: bool = False
 
-        painter.setPen(
-            color.darker()
-        )
+    def add(self, game_board: GameBoard) -> None:
+        self.boards.append(game_board)
 
-        painter.drawLine(
-            x + 1,
-            y + square_height - 1,
-            x + square_width - 1,
-            y + square_height - 1
-        )
+    def add_bot(self, bot: 'Bot') -> None:
+        self.bots.append(bot)
 
-        painter.drawLine(
-            x + square_width - 1,
-            y + square_height - 1,
-            x + square_width - 1,
-            y + 1
-        )
+    def start(self) -> None:
+        self.ticks = 0
+        self.is_paused = False
+
+        self.timer.start(self.INTERVAL, self)
+
+    def stop(self) -> None:
+        self.timer.stop()
+
+    def pause(self) -> None:
+        self.is_paused = not self.is_paused
+
+        if self.is_paused:
+            self.timer.stop()
+
+        else:
+            self.timer.start(self.INTERVAL, self)
+
+    def timerEvent(self, event: QTimerEvent) -> None:
+        if event.timerId() != self.timer.timerId():
+            return
+
+        self.ticks += 1
+
+        for bot in self.bots:
+            bot.act()
+
+        if self.ticks % (GameBoard.SPEED // self.INTERVAL):
+            return
+
+        for game_board in self.boards:
+            if game_board.is_started and not game_board.is_paused:
+                game_board.tick()
+
+
+class Bot:
+    AGGREGATE_HEIGHT_WEIGHT: float = -0.51
+    LINES_WEIGHT: float = 0.76
+    HOLES_WEIGHT: float = -0.36
+    BUMPINESS_WEIGHT: float = -0.18
+
+    def __init__(self, game_board: GameBoard) -> None:
+        self.game_board: GameBoard = game_board
+
+        self.num_piece: int = 0
+        self.rotations: int = 0
+        self.target_x: int = 0
+
+    def plan(self) -> None:
+        game_board: GameBoard = self.game_board
+        piece: Shape = game_board.current_piece
+        best_score: Union[float, None] = None
+
+        self.rotations = 0
+        self.target_x = game_board.current_x
+
+        rotations: int
+        x: int
+
+        for rotations in range(4):
+            for x in range(game_board.BASE_SQUARE_WIDTH):
+                if not game_board.fits(piece, x, game_board.current_y):
+                    continue
+
+                y: int = game_board.current_y
+
+                while game_board.fits(piece, x, y - 1):
+                    y -= 1
+
+                metrics: BoardMetrics = game_board.metrics.copy()
+                metrics.lock([
+                    (x + piece.x(i), y - piece.y(i))
+                    for i in range(4)
+                ])
+
+                lines: int = len(metrics.full_rows())
+
+                score: float = (
+                    self.AGGREGATE_HEIGHT_WEIGHT * (metrics.aggregate_height - lines * game_board.BASE_SQUARE_WIDTH)
+                    + self.LINES_WEIGHT * lines
+                    + self.HOLES_WEIGHT * metrics.holes
+                    + self.BUMPINESS_WEIGHT * metrics.bumpiness
+                )
+
+                if best_score is None or score > best_score:
+                    best_score = score
+                    self.rotations = rotations
+                    self.target_x = x
+
+            piece = piece.rotate_right()
+
+    def act(self) -> None:
+        game_board: GameBoard = self.game_board
+
+        if not game_board.is_started or game_board.current_piece.shape() == Tetrominoe.NoShape:
+            return
+
+        if self.num_piece != game_board.num_pieces:
+            self.num_piece = game_board.num_pieces
+            self.plan()
+
+        moved: bool = False
+
+        if self.rotations > 0:
+            self.rotations -= 1
+
+            moved = game_board.try_move(
+                new_piece = game_board.current_piece.rotate_right(),
+                new_x = game_board.current_x,
+                new_y = game_board.current_y
+            )
+
+        elif game_board.current_x != self.target_x:
+            moved = game_board.try_move(
+                new_piece = game_board.current_piece,
+                new_x = game_board.current_x + (1 if self.target_x > game_board.current_x else -1),
+                new_y = game_board.current_y
+            )
+
+        if not moved:
+            game_board.drop_down()
 
 
 class Tetrominoe:
@@ -569,6 +1401,7 @@ class Tetrominoe:
     SquareShape: int = 5
     LShape: int = 6
     MirroredLShape: int = 7
+    GarbageShape: int = 8
 
 
 class Shape:
@@ -607,7 +1440,7 @@ class Shape:
 
     def set_random_shape(self) -> None:
         self.set_shape(
-            shape = randint(1, len(GameBoard.COLOR_TABLE) - 1)
+            shape = randint(1, Tetrominoe.MirroredLShape)
         )
 
     def x(self, index: int) -> int:
@@ -692,16 +1525,202 @@ class Shape:
         return result
 
 
+def parse_args() -> Namespace:
+    parser: ArgumentParser = ArgumentParser(
+        description = "Tetris"
+    )
+
+    parser.add_argument(
+        "--memory-diagnostics",
+        action = "store_true",
+        help = "report allocations per game-loop phase and memory growth between games"
+    )
+
+    parser.add_argument(
+        "--profile",
+        action = "store_true",
+        help = "start the sampling profiler at launch (F9 starts and stops it at any time)"
+    )
+
+    parser.add_argument(
+        "--profile-output",
+        default = PROFILE_FILENAME,
+        metavar = "PATH",
+        help = "where to save the profile: speedscope for .json, collapsed stacks otherwise"
+    )
+
+    parser.add_argument(
+        "--export-dataset",
+        default = None,
+        metavar = "DIRECTORY",
+        help = "record every lock as a training sample into memory-mapped .npy shards (requires numpy)"
+    )
+
+    parser.add_argument(
+        "--spectator-port",
+        type = int,
+        default = None,
+        metavar = "PORT",
+        help = "publish the game on 127.0.0.1:PORT for spectators"
+    )
+
+    parser.add_argument(
+        "--spectate",
+        default = None,
+        metavar = "[HOST:]PORT",
+        help = "watch a game published with --spectator-port"
+    )
+
+    parser.add_argument(
+        "--versus",
+        type = int,
+        default = 0,
+        metavar = "BOARDS",
+        help = f"split-screen mode with {VERSUS_MIN_BOARDS}-{VERSUS_MAX_BOARDS} boards"
+    )
+
+    parser.add_argument(
+        "--bots",
+        type = int,
+        default = None,
+        help = "number of bot boards in versus mode (default: all but one)"
+    )
+
+    args: Namespace = parser.parse_args()
+
+    if args.versus:
+        if args.spectator_port is not None:
+            parser.error("--spectator-port can't be combined with --versus")
+
+        if not VERSUS_MIN_BOARDS <= args.versus <= VERSUS_MAX_BOARDS:
+            parser.error(f"--versus must be between {VERSUS_MIN_BOARDS} and {VERSUS_MAX_BOARDS}")
+
+        if args.bots is None:
+            args.bots = args.versus - 1
+
+        if not args.versus - len(PLAYER_KEY_MAPS) <= args.bots <= args.versus:
+            parser.error(f"--bots must leave at most {len(PLAYER_KEY_MAPS)} human players")
+
+    return args
+
+
 def main():
+    args: Namespace = parse_args()
+
     app: QApplication = QApplication([])
 
-    main_window: MainWindow = MainWindow(
-        clipboard = app.clipboard()
+    diagnostics: MemoryDiagnostics = MemoryDiagnostics(
+        enabled = args.memory_diagnostics
     )
 
-    app.exec_()
+    profiler: SamplingProfiler = SamplingProfiler()
+
+    if args.profile:
+        profiler.start()
+
+    exporter: Union[DatasetExporter, None] = None
+
+    if args.export_dataset:
+        try:
+            exporter = DatasetExporter(
+                directory = args.export_dataset,
+                width = GameBoard.BASE_SQUARE_WIDTH,
+                height = GameBoard.BASE_SQUARE_HEIGHT
+            )
+
+        except (RuntimeError, ValueError, OSError) as error:
+            print(f"Can't export dataset to {args.export_dataset}: {error}")
+            return
+
+    if args.spectate:
+        host: str
+        port: str
+
+        host, _, port = args.spectate.rpartition(":")
+
+        try:
+            client: SpectatorClient = SpectatorClient(
+                host = host or DEFAULT_SPECTATOR_HOST,
+                port = int(port)
+            )
+
+        except (OSError, ValueError) as error:
+            print(f"Can't connect to {args.spectate}: {error}")
+            return
+
+        spectator_window: SpectatorWindow = SpectatorWindow(
+            diagnostics = diagnostics,
+            client = client
+        )
+
+        app.exec_()
+
+        spectator_window.renderer.stop()
+        client.close()
+
+        return
+
+    if args.versus:
+        versus_window: VersusWindow = VersusWindow(
+            diagnostics = diagnostics,
+            profiler = profiler,
+            profile_path = args.profile_output,
+            boards = args.versus,
+            bots = args.bots,
+            exporter = exporter
+        )
+
+        app.exec_()
+
+        versus_window.renderer.stop()
+
+    else:
+        spectator: Union[SpectatorPublisher, None] = None
+
+        if args.spectator_port is not None:
+            try:
+                spectator = SpectatorPublisher(
+                    port = args.spectator_port
+                )
+
+            except OSError as error:
+                print(f"Can't publish on port {args.spectator_port}: {error}")
+                return
+
+        main_window: MainWindow = MainWindow(
+            clipboard = app.clipboard(),
+            diagnostics = diagnostics,
+            profiler = profiler,
+            profile_path = args.profile_output,
+            exporter = exporter,
+            spectator = spectator
+        )
+
+        app.exec_()
+
+        main_window.renderer.stop()
+        main_window.game_board.save_points()
+
+        if spectator is not None:
+            spectator.close()
+
+    if profiler.is_running:
+        profiler.stop()
+
+        try:
+            profiler.export(args.profile_output)
+
+        except OSError as error:
+            print(f"Can't save profile to {args.profile_output}: {error}")
+
+    if exporter is not None:
+        try:
+            exporter.close()
+
+        except OSError as error:
+            print(f"Can't export dataset: {error}")
 
-    main_window.game_board.save_points()
+    diagnostics.print_report()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,191 @@
+from collections import deque
+from struct import Struct
+
+from typing import Deque, Iterable, List, Tuple, Union
+
+
+SPINE_INTERVAL: int = 32
+
+# NOTE: lines cleared so far, locked piece, changed rows count, removed rows count
+VERSION: Struct = Struct("<IBBB")
+
+Row = bytes
+
+
+def encode_version(lines: int, piece: int, changes: List[Tuple[int, Row]], removed: Tuple[int, ...]) -> bytes:
+    return (
+        VERSION.pack(lines, piece, len(changes), len(removed))
+        + bytes(removed)
+        + bytes(y for y, _ in changes)
+        + b"".join(row for _, row in changes)
+    )
+
+
+def apply_version(version: bytes, rows: List[Row], width: int, empty_row: Row) -> None:
+    changed_count: int
+    removed_count: int
+
+    _, _, changed_count, removed_count = VERSION.unpack_from(version)
+
+    offset: int = VERSION.size
+    y: int
+
+    for y in version[offset:offset + removed_count]:
+        del rows[y]
+
+    rows.extend([empty_row] * removed_count)
+
+    offset += removed_count
+    cells: int = offset + changed_count
+
+    for i, y in enumerate(version[offset:cells]):
+        rows[y] = version[cells + i * width:cells + (i + 1) * width]
+
+
+class BoardHistory:
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        max_length: int,
+        empty: int = 0,
+        spine_interval: int = SPINE_INTERVAL
+    ) -> None:
+        self.width: int = width
+        self.height: int = height
+        self.max_length: int = max_length
+        self.spine_interval: int = spine_interval
+        self.empty_row: Row = bytes((empty,) * width)
+
+        # NOTE: each version is a packed delta against the previous one;
+        # spines keeps the full board every spine_interval versions, None otherwise.
+        self.versions: Deque[bytes] = deque()
+        self.spines: Deque[Union[bytes, None]] = deque()
+        self.rows: List[Row] = []
+        self.since_spine: int = 0
+
+    def __len__(self) -> int:
+        return len(self.versions)
+
+    def get_row(self, board: List[int], y: int) -> Row:
+        row: Row = bytes(board[y * self.width:(y + 1) * self.width])
+
+        if row == self.empty_row:
+            return self.empty_row
+
+        return row
+
+    def get_spine(self) -> bytes:
+        return b"".join(self.rows)
+
+    def split_spine(self, spine: bytes) -> List[Row]:
+        return [
+            spine[y * self.width:(y + 1) * self.width]
+            for y in range(self.height)
+        ]
+
+    def reset(self, board: List[int], lines: int = 0) -> None:
+        self.rows = [
+            self.get_row(board, y)
+            for y in range(self.height)
+        ]
+
+        self.versions.clear()
+        self.spines.clear()
+
+        self.versions.append(encode_version(lines, 0, [], ()))
+        self.spines.append(self.get_spine())
+        self.since_spine = 0
+
+    def record(
+        self,
+        board: List[int],
+        lines: int,
+        piece: int,
+        changed_rows: Iterable[int],
+        removed_rows: Iterable[int] = ()
+    ) -> None:
+        removed: Tuple[int, ...] = tuple(sorted(set(removed_rows), reverse=True))
+        changes: List[Tuple[int, Row]] = []
+
+        for y in sorted(set(changed_rows)):
+            if y in removed:
+                continue
+
+            new_y: int = y - sum(1 for removed_y in removed if removed_y < y)
+            changes.append((new_y, self.get_row(board, new_y)))
+
+        version: bytes = encode_version(lines, piece, changes, removed)
+
+        apply_version(version, self.rows, self.width, self.empty_row)
+        self.since_spine += 1
+
+        spine: Union[bytes, None] = None
+
+        if self.since_spine >= self.spine_interval:
+            spine = self.get_spine()
+            self.since_spine = 0
+
+        self.versions.append(version)
+        self.spines.append(spine)
+
+        if len(self.versions) > self.max_length:
+            self.evict()
+
+    def evict(self) -> None:
+        self.versions.popleft()
+        oldest: bytes = self.spines.popleft()
+
+        # NOTE: replaying always starts from a spine, so the oldest kept
+        # version has to be one; rebuild it from the evicted spine.
+        if self.spines[0] is None:
+            rows: List[Row] = self.split_spine(oldest)
+            apply_version(self.versions[0], rows, self.width, self.empty_row)
+            self.spines[0] = b"".join(rows)
+
+    def index_of(self, index: int) -> int:
+        if index < 0:
+            index += len(self.versions)
+
+        if not 0 <= index < len(self.versions):
+            raise IndexError(index)
+
+        return index
+
+    def rows_at(self, index: int) -> List[Row]:
+        spine_index: int = index
+
+        while self.spines[spine_index] is None:
+            spine_index -= 1
+
+        rows: List[Row] = self.split_spine(self.spines[spine_index])
+
+        for i in range(spine_index + 1, index + 1):
+            apply_version(self.versions[i], rows, self.width, self.empty_row)
+
+        return rows
+
+    def board_at(self, index: int) -> List[int]:
+        return list(b"".join(self.rows_at(self.index_of(index))))
+
+    def rewind(self, index: int) -> Tuple[List[int], int, Union[int, None]]:
+        index = self.index_of(index)
+
+        lines: int = VERSION.unpack_from(self.versions[index])[0]
+        next_piece: Union[int, None] = None
+
+        if index + 1 < len(self.versions):
+            next_piece = VERSION.unpack_from(self.versions[index + 1])[1]
+
+        self.rows = self.rows_at(index)
+
+        while len(self.versions) > index + 1:
+            self.versions.pop()
+            self.spines.pop()
+
+        self.since_spine = 0
+
+        while self.spines[-1 - self.since_spine] is None:
+            self.since_spine += 1
+
+        return list(b"".join(self.rows)), lines, next_piece
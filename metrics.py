@@ -0,0 +1,162 @@
+from typing import Iterable, List, Set, Tuple
+
+
+class BoardMetrics:
+    def __init__(self, width: int, height: int, empty: int = 0) -> None:
+        self.width: int = width
+        self.height: int = height
+        self.empty: int = empty
+
+        self.column_heights: List[int] = [0] * width
+        self.column_holes: List[int] = [0] * width
+        self.well_depths: List[int] = [0] * width
+        self.row_fill: List[int] = [0] * height
+
+        self.holes: int = 0
+        self.bumpiness: int = 0
+        self.aggregate_height: int = 0
+
+    def copy(self) -> 'BoardMetrics':
+        metrics: BoardMetrics = BoardMetrics(
+            width = self.width,
+            height = self.height,
+            empty = self.empty
+        )
+
+        metrics.column_heights = self.column_heights[:]
+        metrics.column_holes = self.column_holes[:]
+        metrics.well_depths = self.well_depths[:]
+        metrics.row_fill = self.row_fill[:]
+
+        metrics.holes = self.holes
+        metrics.bumpiness = self.bumpiness
+        metrics.aggregate_height = self.aggregate_height
+
+        return metrics
+
+    def max_height(self) -> int:
+        return max(self.column_heights)
+
+    def full_rows(self) -> List[int]:
+        return [
+            y
+            for y in range(self.height)
+            if self.row_fill[y] == self.width
+        ]
+
+    def reset(self, board: List[int]) -> None:
+        x: int
+        y: int
+
+        for x in range(self.width):
+            height: int = 0
+            filled: int = 0
+
+            for y in range(self.height):
+                if board[y * self.width + x] != self.empty:
+                    height = y + 1
+                    filled += 1
+
+            self.column_heights[x] = height
+            self.column_holes[x] = height - filled
+
+        for y in range(self.height):
+            self.row_fill[y] = sum(
+                1
+                for x in range(self.width)
+                if board[y * self.width + x] != self.empty
+            )
+
+        self.holes = sum(self.column_holes)
+        self.aggregate_height = sum(self.column_heights)
+        self.bumpiness = sum(
+            abs(self.column_heights[x] - self.column_heights[x + 1])
+            for x in range(self.width - 1)
+        )
+
+        for x in range(self.width):
+            self.update_well(x)
+
+    def lock(self, cells: Iterable[Tuple[int, int]]) -> None:
+        cells = sorted(cells, key=lambda cell: cell[1])
+        columns: Set[int] = {x for x, _ in cells}
+
+        self.bumpiness -= self.column_bumpiness(columns)
+
+        x: int
+        y: int
+
+        for x, y in cells:
+            height: int = self.column_heights[x]
+
+            if y >= height:
+                self.column_holes[x] += y - height
+                self.holes += y - height
+                self.aggregate_height += y + 1 - height
+                self.column_heights[x] = y + 1
+
+            else:
+                self.column_holes[x] -= 1
+                self.holes -= 1
+
+            self.row_fill[y] += 1
+
+        self.bumpiness += self.column_bumpiness(columns)
+        self.update_wells(columns)
+
+    def clear(self, rows: Iterable[int], board: List[int]) -> None:
+        rows = sorted(rows, reverse=True)
+
+        if not rows:
+            return
+
+        y: int
+        x: int
+
+        for y in rows:
+            del self.row_fill[y]
+
+        self.row_fill.extend([0] * len(rows))
+
+        columns: Set[int] = {
+            x
+            for x in range(self.width)
+            if self.column_heights[x] - 1 in rows
+        }
+
+        self.bumpiness -= self.column_bumpiness(columns)
+
+        for x in range(self.width):
+            height: int = self.column_heights[x] - len(rows)
+
+            if x in columns:
+                while height > 0 and board[(height - 1) * self.width + x] == self.empty:
+                    height -= 1
+                    self.column_holes[x] -= 1
+                    self.holes -= 1
+
+            self.aggregate_height -= self.column_heights[x] - height
+            self.column_heights[x] = height
+
+        self.bumpiness += self.column_bumpiness(columns)
+        self.update_wells(columns | {0, self.width - 1})
+
+    def column_bumpiness(self, columns: Set[int]) -> int:
+        return sum(
+            abs(self.column_heights[x] - self.column_heights[x + 1])
+            for x in {x + dx for x in columns for dx in (-1, 0)}
+            if 0 <= x < self.width - 1
+        )
+
+    def update_wells(self, columns: Set[int]) -> None:
+        x: int
+
+        for x in {x + dx for x in columns for dx in (-1, 0, 1)}:
+            if 0 <= x < self.width:
+                self.update_well(x)
+
+    def update_well(self, x: int) -> None:
+        left: int = self.column_heights[x - 1] if x > 0 else self.height
+        right: int = self.column_heights[x + 1] if x + 1 < self.width else self.height
+
+        self.well_depths[x] = max(min(left, right) - self.column_heights[x], 0)
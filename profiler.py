@@ -0,0 +1,189 @@
+from simplejson import dump as dump_json
+from collections import Counter
+from os.path import basename
+from threading import Event, Thread, get_ident
+from time import perf_counter
+from types import FrameType
+import sys
+
+from typing import Counter as CounterType, Dict, List, Tuple, Union
+
+
+PROFILER_INTERVAL: float = 0.005
+PROFILER_SWITCH_INTERVAL_RATIO: float = 0.1
+PROFILE_FILE_ENCODING: str = "utf-8"
+SPEEDSCOPE_SCHEMA: str = "https://www.speedscope.app/file-format-schema.json"
+
+SUBSYSTEMS: Dict[str, str] = {
+    "keyPressEvent": "input",
+    "handle_key": "input",
+    "surface_key_press_event": "input",
+    "timerEvent": "tick",
+    "tick": "tick",
+    "one_line_down": "tick",
+    "piece_dropped": "lock",
+    "remove_full_lines": "lock",
+    "paintEvent": "paint",
+    "paint": "paint",
+    "draw_square": "paint",
+    "surface_paint_event": "paint",
+    "save": "persistence"
+}
+
+OTHER_SUBSYSTEM: str = "other"
+
+
+Frame = Tuple[str, str, int]
+Stack = Tuple[Frame, ...]
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = PROFILER_INTERVAL) -> None:
+        self.interval: float = interval
+
+        self.samples: CounterType[Stack] = Counter()
+        self.thread: Union[Thread, None] = None
+        self.stopping: Event = Event()
+        self.target_thread_id: int = 0
+        self.switch_interval: float = sys.getswitchinterval()
+
+    @property
+    def is_running(self) -> bool:
+        return self.thread is not None
+
+    def start(self, thread_id: Union[int, None] = None) -> None:
+        if self.is_running:
+            return
+
+        self.target_thread_id = get_ident() if thread_id is None else thread_id
+        self.samples.clear()
+        self.stopping.clear()
+
+        # NOTE: the sampler only runs when the game thread gives up the GIL,
+        # so make it give it up often enough for samples to land inside busy code.
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, self.interval * PROFILER_SWITCH_INTERVAL_RATIO))
+
+        self.thread = Thread(
+            target = self.run,
+            name = "profiler",
+            daemon = True
+        )
+
+        self.thread.start()
+
+    def stop(self) -> None:
+        if not self.is_running:
+            return
+
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+
+        sys.setswitchinterval(self.switch_interval)
+
+    def toggle(self, path: str) -> bool:
+        if not self.is_running:
+            self.start()
+            return True
+
+        self.stop()
+        self.export(path)
+
+        return False
+
+    def run(self) -> None:
+        last_time: float = perf_counter()
+
+        while not self.stopping.wait(self.interval):
+            frame: Union[FrameType, None] = sys._current_frames().get(self.target_thread_id)
+
+            now: float = perf_counter()
+            elapsed: float = now - last_time
+            last_time = now
+
+            if frame is None:
+                continue
+
+            self.samples[self.get_stack(frame)] += elapsed
+
+    def get_stack(self, frame: FrameType) -> Stack:
+        stack: List[Frame] = []
+        subsystem: Union[str, None] = None
+
+        while frame is not None:
+            name: str = frame.f_code.co_name
+
+            if subsystem is None:
+                subsystem = SUBSYSTEMS.get(name)
+
+            stack.append((name, basename(frame.f_code.co_filename), frame.f_code.co_firstlineno))
+            frame = frame.f_back
+
+        stack.append((subsystem or OTHER_SUBSYSTEM, "", 0))
+        stack.reverse()
+
+        return tuple(stack)
+
+    def to_collapsed(self) -> str:
+        return "".join(
+            ";".join(
+                f"{name} ({file}:{line})" if file else name
+                for name, file, line in stack
+            ) + f" {round(seconds * 1000000)}\n"
+            for stack, seconds in self.samples.items()
+        )
+
+    def to_speedscope(self) -> dict:
+        frames: List[dict] = []
+        frame_indexes: Dict[Frame, int] = {}
+        samples: List[List[int]] = []
+        weights: List[float] = []
+
+        for stack, seconds in self.samples.items():
+            sample: List[int] = []
+
+            for frame in stack:
+                if frame not in frame_indexes:
+                    frame_indexes[frame] = len(frames)
+                    frames.append(
+                        {"name": frame[0], "file": frame[1], "line": frame[2]}
+                        if frame[1] else
+                        {"name": frame[0]}
+                    )
+
+                sample.append(frame_indexes[frame])
+
+            samples.append(sample)
+            weights.append(seconds * 1000)
+
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": "Tetris",
+            "exporter": "tetris",
+            "shared": {
+                "frames": frames
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": "Tetris",
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights
+                }
+            ]
+        }
+
+    def export(self, path: str) -> None:
+        with open(path, "w", encoding=PROFILE_FILE_ENCODING) as file:
+            if path.endswith(".json"):
+                dump_json(
+                    obj = self.to_speedscope(),
+                    fp = file
+                )
+
+            else:
+                file.write(self.to_collapsed())
@@ -0,0 +1,193 @@
+from PyQt5.QtCore import Qt, QThread, pyqtBoundSignal, pyqtSignal, QObject
+from PyQt5.QtGui import QPainter, QColor, QImage
+
+from threading import Condition
+
+from typing import Dict, Hashable, List, Tuple, Union
+
+
+Colors = Tuple[QColor, QColor, QColor]
+
+
+def draw_square(painter: QPainter, x: int, y: int, square_width: int, square_height: int, colors: Colors) -> None:
+    color: QColor
+    light_color: QColor
+    dark_color: QColor
+
+    color, light_color, dark_color = colors
+
+    painter.fillRect(
+        x + 1,
+        y + 1,
+        square_width - 2,
+        square_height - 2,
+        color
+    )
+
+    painter.setPen(
+        light_color
+    )
+
+    painter.drawLine(
+        x,
+        y + square_height - 1,
+        x,
+        y
+    )
+
+    painter.drawLine(
+        x,
+        y,
+        x + square_width - 1,
+        y
+    )
+
+    painter.setPen(
+        dark_color
+    )
+
+    painter.drawLine(
+        x + 1,
+        y + square_height - 1,
+        x + square_width - 1,
+        y + square_height - 1
+    )
+
+    painter.drawLine(
+        x + square_width - 1,
+        y + square_height - 1,
+        x + square_width - 1,
+        y + 1
+    )
+
+
+class RenderRequest:
+    def __init__(
+        self,
+        cells: Tuple[int, ...],
+        columns: int,
+        rows: int,
+        square_width: int,
+        square_height: int,
+        colors: List[Colors],
+        generation: int
+    ) -> None:
+        self.cells: Tuple[int, ...] = cells
+        self.columns: int = columns
+        self.rows: int = rows
+        self.square_width: int = square_width
+        self.square_height: int = square_height
+        self.colors: List[Colors] = colors
+        self.generation: int = generation
+
+    def size(self) -> Tuple[int, int]:
+        return self.columns * self.square_width, self.rows * self.square_height
+
+
+class Layer:
+    def __init__(self, image: QImage, generation: int) -> None:
+        self.image: QImage = image
+        self.generation: int = generation
+
+
+class BoardRenderer(QThread):
+    rendered: pyqtBoundSignal = pyqtSignal(object)
+
+    def __init__(self, parent: Union[QObject, None] = None) -> None:
+        super(BoardRenderer, self).__init__(parent)
+
+        self.condition: Condition = Condition()
+        self.is_stopping: bool = False
+
+        self.pending: Dict[Hashable, RenderRequest] = {}
+        self.front: Dict[Hashable, Layer] = {}
+        self.back: Dict[Hashable, Layer] = {}
+
+    def request(self, key: Hashable, request: RenderRequest) -> None:
+        with self.condition:
+            self.pending[key] = request
+            self.condition.notify()
+
+    def blit(self, key: Hashable, painter: QPainter, x: int, y: int, width: int, height: int, min_generation: int) -> Union[int, None]:
+        with self.condition:
+            layer: Union[Layer, None] = self.front.get(key)
+
+            if layer is None or layer.generation < min_generation:
+                return None
+
+            if layer.image.width() != width or layer.image.height() != height:
+                return None
+
+            painter.drawImage(x, y, layer.image)
+
+            return layer.generation
+
+    def stop(self) -> None:
+        with self.condition:
+            self.is_stopping = True
+            self.condition.notify()
+
+        self.wait()
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                while not self.pending and not self.is_stopping:
+                    self.condition.wait()
+
+                if self.is_stopping:
+                    return
+
+                key: Hashable = next(iter(self.pending))
+                request: RenderRequest = self.pending.pop(key)
+                layer: Union[Layer, None] = self.back.pop(key, None)
+
+            width: int
+            height: int
+
+            width, height = request.size()
+
+            if width <= 0 or height <= 0:
+                continue
+
+            if layer is None or layer.image.width() != width or layer.image.height() != height:
+                layer = Layer(
+                    image = QImage(width, height, QImage.Format_ARGB32_Premultiplied),
+                    generation = request.generation
+                )
+
+            layer.generation = request.generation
+            self.render(layer.image, request)
+
+            with self.condition:
+                previous: Union[Layer, None] = self.front.get(key)
+                self.front[key] = layer
+
+                if previous is not None:
+                    self.back[key] = previous
+
+            self.rendered.emit(key)
+
+    def render(self, image: QImage, request: RenderRequest) -> None:
+        image.fill(Qt.transparent)
+
+        painter: QPainter = QPainter(image)
+
+        x: int
+        y: int
+
+        for y in range(request.rows):
+            for x in range(request.columns):
+                shape: int = request.cells[y * request.columns + x]
+
+                if shape:
+                    draw_square(
+                        painter = painter,
+                        x = x * request.square_width,
+                        y = (request.rows - y - 1) * request.square_height,
+                        square_width = request.square_width,
+                        square_height = request.square_height,
+                        colors = request.colors[shape]
+                    )
+
+        painter.end()
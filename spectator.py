@@ -0,0 +1,356 @@
+from collections import deque
+from struct import Struct
+import socket
+
+from typing import Deque, Iterable, List, Sequence, Tuple, Union
+
+
+DEFAULT_SPECTATOR_HOST: str = "127.0.0.1"
+DEFAULT_SPECTATOR_PORT: int = 47000
+
+KEYFRAME_INTERVAL: int = 256
+MAX_BACKLOG: int = 16 * 1024
+RECEIVE_SIZE: int = 64 * 1024
+
+
+class MessageTypes:
+    keyframe: int = 1
+    piece: int = 2
+    lock: int = 3
+    clear: int = 4
+
+
+HEADER: Struct = Struct("<BH")
+PIECE: Struct = Struct("<Bbb8b")
+KEYFRAME: Struct = Struct("<BBI")
+LOCK: Struct = Struct("<BB")
+CLEAR: Struct = Struct("<IB")
+
+Coords = Sequence[Sequence[int]]
+
+
+def encode(message_type: int, payload: bytes) -> bytes:
+    return HEADER.pack(message_type, len(payload)) + payload
+
+
+def encode_piece(shape: int, x: int, y: int, coords: Coords) -> bytes:
+    return encode(MessageTypes.piece, PIECE.pack(
+        shape,
+        x,
+        y,
+        *(value for coord in coords for value in coord)
+    ))
+
+
+def encode_keyframe(board: Sequence[int], width: int, height: int, lines: int, shape: int, x: int, y: int, coords: Coords) -> bytes:
+    cells: bytes = bytes(
+        (board[i] << 4) | (board[i + 1] if i + 1 < len(board) else 0)
+        for i in range(0, len(board), 2)
+    )
+
+    return encode(
+        MessageTypes.keyframe,
+        KEYFRAME.pack(width, height, lines) + encode_piece(shape, x, y, coords)[HEADER.size:] + cells
+    )
+
+
+def encode_lock(shape: int, cells: Sequence[Tuple[int, int]]) -> bytes:
+    return encode(
+        MessageTypes.lock,
+        LOCK.pack(shape, len(cells)) + bytes(value for cell in cells for value in cell)
+    )
+
+
+def encode_clear(rows: Sequence[int], lines: int) -> bytes:
+    return encode(
+        MessageTypes.clear,
+        CLEAR.pack(lines, len(rows)) + bytes(rows)
+    )
+
+
+class SpectatorState:
+    def __init__(self) -> None:
+        self.width: int = 0
+        self.height: int = 0
+        self.board: List[int] = []
+        self.lines: int = 0
+
+        self.shape: int = 0
+        self.x: int = 0
+        self.y: int = 0
+        self.coords: List[Tuple[int, int]] = [(0, 0)] * 4
+
+        self.is_synced: bool = False
+        self.board_version: int = 0
+
+    def set_piece(self, payload: bytes) -> None:
+        values: Tuple[int, ...] = PIECE.unpack(payload)
+
+        self.shape, self.x, self.y = values[:3]
+        self.coords = [
+            (values[3 + i * 2], values[4 + i * 2])
+            for i in range(4)
+        ]
+
+    def apply(self, message_type: int, payload: bytes) -> None:
+        if message_type == MessageTypes.keyframe:
+            self.width, self.height, self.lines = KEYFRAME.unpack_from(payload)
+            self.set_piece(payload[KEYFRAME.size:KEYFRAME.size + PIECE.size])
+
+            cells: bytes = payload[KEYFRAME.size + PIECE.size:]
+
+            self.board = [
+                value
+                for cell in cells
+                for value in (cell >> 4, cell & 0x0F)
+            ][:self.width * self.height]
+
+            self.is_synced = True
+            self.board_version += 1
+            return
+
+        if not self.is_synced:
+            return
+
+        if message_type == MessageTypes.piece:
+            self.set_piece(payload)
+
+        elif message_type == MessageTypes.lock:
+            shape: int
+            count: int
+
+            shape, count = LOCK.unpack_from(payload)
+
+            for i in range(count):
+                x: int = payload[LOCK.size + i * 2]
+                y: int = payload[LOCK.size + i * 2 + 1]
+
+                self.board[y * self.width + x] = shape
+
+            self.board_version += 1
+
+        elif message_type == MessageTypes.clear:
+            count: int
+
+            self.lines, count = CLEAR.unpack_from(payload)
+
+            for y in payload[CLEAR.size:CLEAR.size + count]:
+                del self.board[y * self.width:(y + 1) * self.width]
+                self.board.extend([0] * self.width)
+
+            self.shape = 0
+            self.board_version += 1
+
+
+class SpectatorConnection:
+    def __init__(self, connection: socket.socket) -> None:
+        self.socket: socket.socket = connection
+        self.messages: Deque[bytes] = deque()
+        self.offset: int = 0
+        self.backlog: int = 0
+
+
+class SpectatorPublisher:
+    def __init__(
+        self,
+        port: int = DEFAULT_SPECTATOR_PORT,
+        host: str = DEFAULT_SPECTATOR_HOST,
+        keyframe_interval: int = KEYFRAME_INTERVAL,
+        max_backlog: int = MAX_BACKLOG
+    ) -> None:
+        self.keyframe_interval: int = keyframe_interval
+        self.max_backlog: int = max_backlog
+
+        self.server: socket.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+        try:
+            self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server.bind((host, port))
+            self.server.listen()
+
+        except OSError:
+            self.server.close()
+            raise
+
+        self.server.setblocking(False)
+
+        self.connections: List[SpectatorConnection] = []
+        self.keyframe_message: Union[bytes, None] = None
+        self.deltas: List[bytes] = []
+
+    def is_keyframe_due(self) -> bool:
+        return self.keyframe_message is None or len(self.deltas) >= self.keyframe_interval
+
+    def poll(self) -> None:
+        while True:
+            try:
+                connection: socket.socket
+                connection, _ = self.server.accept()
+
+            except BlockingIOError:
+                break
+
+            connection.setblocking(False)
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            spectator: SpectatorConnection = SpectatorConnection(connection)
+            self.connections.append(spectator)
+            self.resync(spectator)
+
+        self.flush_all()
+
+    def keyframe(self, board: Sequence[int], width: int, height: int, lines: int, shape: int, x: int, y: int, coords: Coords) -> None:
+        self.keyframe_message = encode_keyframe(board, width, height, lines, shape, x, y, coords)
+        self.deltas = []
+
+        for spectator in self.connections:
+            self.resync(spectator)
+
+    def piece(self, shape: int, x: int, y: int, coords: Coords) -> None:
+        self.send(encode_piece(shape, x, y, coords))
+
+    def lock(self, shape: int, cells: Sequence[Tuple[int, int]]) -> None:
+        self.send(encode_lock(shape, cells))
+
+    def clear(self, rows: Sequence[int], lines: int) -> None:
+        self.send(encode_clear(rows, lines))
+
+    def send(self, message: bytes) -> None:
+        if self.keyframe_message is None:
+            return
+
+        # NOTE: only queue here, the game flushes once per tick and on the poll timer.
+
+        self.deltas.append(message)
+
+        for spectator in self.connections:
+            spectator.messages.append(message)
+            spectator.backlog += len(message)
+
+            if spectator.backlog > self.max_backlog:
+                self.resync(spectator)
+
+    def resync(self, spectator: SpectatorConnection) -> None:
+        head: Union[bytes, None] = spectator.messages[0] if spectator.offset else None
+
+        spectator.messages.clear()
+        spectator.backlog = 0
+
+        if head is not None:
+            spectator.messages.append(head)
+            spectator.backlog = len(head) - spectator.offset
+
+        if self.keyframe_message is None:
+            return
+
+        for message in [self.keyframe_message, *self.deltas]:
+            spectator.messages.append(message)
+            spectator.backlog += len(message)
+
+    def flush_all(self) -> None:
+        closed: List[SpectatorConnection] = [
+            spectator
+            for spectator in self.connections
+            if not self.flush(spectator)
+        ]
+
+        for spectator in closed:
+            spectator.socket.close()
+            self.connections.remove(spectator)
+
+    def flush(self, spectator: SpectatorConnection) -> bool:
+        if len(spectator.messages) > 1:
+            queued: bytes = b"".join(spectator.messages)
+
+            spectator.messages.clear()
+            spectator.messages.append(queued)
+
+        while spectator.messages:
+            data: bytes = spectator.messages[0][spectator.offset:] if spectator.offset else spectator.messages[0]
+
+            try:
+                sent: int = spectator.socket.send(data)
+
+            except (BlockingIOError, InterruptedError):
+                return True
+
+            except OSError:
+                return False
+
+            spectator.backlog -= sent
+
+            if sent < len(data):
+                spectator.offset += sent
+                return True
+
+            spectator.messages.popleft()
+            spectator.offset = 0
+
+        return True
+
+    def close(self) -> None:
+        for spectator in self.connections:
+            spectator.socket.close()
+
+        self.connections = []
+        self.server.close()
+
+
+class SpectatorClient:
+    def __init__(self, host: str = DEFAULT_SPECTATOR_HOST, port: int = DEFAULT_SPECTATOR_PORT) -> None:
+        self.socket: socket.socket = socket.create_connection((host, port))
+        self.socket.setblocking(False)
+
+        self.buffer: bytearray = bytearray()
+        self.state: SpectatorState = SpectatorState()
+        self.is_connected: bool = True
+
+    def poll(self) -> bool:
+        changed: bool = False
+
+        while self.is_connected:
+            try:
+                data: bytes = self.socket.recv(RECEIVE_SIZE)
+
+            except (BlockingIOError, InterruptedError):
+                break
+
+            except OSError:
+                data = b""
+
+            if not data:
+                self.is_connected = False
+                self.socket.close()
+                break
+
+            self.buffer += data
+
+        for message_type, payload in self.read_messages():
+            self.state.apply(message_type, payload)
+            changed = True
+
+        return changed
+
+    def read_messages(self) -> Iterable[Tuple[int, bytes]]:
+        offset: int = 0
+
+        while len(self.buffer) - offset >= HEADER.size:
+            message_type: int
+            length: int
+
+            message_type, length = HEADER.unpack_from(self.buffer, offset)
+
+            if len(self.buffer) - offset - HEADER.size < length:
+                break
+
+            start: int = offset + HEADER.size
+            offset = start + length
+
+            yield message_type, bytes(self.buffer[start:offset])
+
+        del self.buffer[:offset]
+
+    def close(self) -> None:
+        if self.is_connected:
+            self.is_connected = False
+            self.socket.close()